@@ -13,6 +13,14 @@ import pandas as pd
 _LOGGER = logging.getLogger(__name__)
 
 
+def convert(df_in: pd.DataFrame) -> pd.DataFrame:
+    """Convert purchase order line items to TME's SKU, quantity format."""
+    df_out = df_in[["SKU", "quantity"]].copy()
+    # InvenTree exports quantity as float for some reason
+    df_out["quantity"] = df_out["quantity"].astype(int)
+    return df_out
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -46,9 +54,7 @@ def main():
 
         _LOGGER.debug("read csv:\n%s", df_in)
 
-        df_out = df_in[["SKU", "quantity"]].copy()
-        # InvenTree exports quantity as float for some reason
-        df_out["quantity"] = df_out["quantity"].astype(int)
+        df_out = convert(df_in)
 
         with args.out_file as fw:
             df_out.to_csv(
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""Correctness checks and throughput benchmarks of the parsing hot paths.
+
+Fixture corpora are generated deterministically together with the expected
+results. Since those are built by the same assumptions as the parser, captured
+product pages from prusa3d.com are checked as well: every prusa_pages/*.html
+(or --prusa-pages directory) is parsed and compared against the
+parse_prusa_json output written down by hand in the *.json file of the same
+name. Capture a page with e.g.
+curl -o prusa_pages/original-prusa-nozzle.html https://www.prusa3d.com/product/...
+Pages without a *.json are only checked to parse without errors.
+
+I usually run it like this:
+./benchmark.py -b bench_baseline.json --save-baseline  # before a change
+./benchmark.py -b bench_baseline.json                  # after it
+The second run fails if throughput of any benchmark dropped by more than
+--tolerance.
+"""
+
+import argparse
+import io
+import json
+import logging
+import pathlib
+import random
+import sys
+import time
+import pandas as pd
+import ges_caps
+import PO2TME
+import prusa3d_eshop
+
+_LOGGER = logging.getLogger(__name__)
+
+PRUSA_PAGES = pathlib.Path(__file__).parent / "prusa_pages"
+
+
+def decimal_comma(value: float) -> str:
+    return f"{value:g}".replace(".", ",")
+
+
+def ges_corpus(n: int, rng: random.Random) -> list[tuple[ges_caps.Component, dict | None]]:
+    """Return (component, expected attributes) pairs.
+
+    Expected attributes are None for names that should not be recognized.
+    """
+    capacitances = [0.1, 0.22, 0.47, 1, 2.2, 4.7, 10, 22, 33, 47, 100, 220, 470, 1000, 2200, 4700, 10000]
+    voltages = [6.3, 10, 16, 25, 35, 50, 63, 100, 160, 250, 400, 450]
+    pitches = [1.5, 2, 2.5, 3.5, 5, 7.5]
+    corpus = []
+    for _ in range(n):
+        capacitance = rng.choice(capacitances)
+        voltage = rng.choice(voltages)
+        high_temperature = rng.random() < 0.5
+        dimensions = f"{rng.choice([5, 6.3, 8, 10, 12.5, 16, 18, 22, 35]):g}x{rng.randint(5, 60)}"
+        kind = rng.choice(["RAD", "BSN", "RAD BIP", "AXI", "unknown"])
+        expected = {
+            "capacitance": f"{capacitance}µF",
+            "rated_voltage": f"{voltage}V",
+            "package_type": f"Ø{dimensions}mm",
+            "mounting_type": "THT",
+        }
+        if kind == "RAD":
+            pitch = rng.choice(pitches)
+            name = f"RAD {decimal_comma(capacitance)}/{decimal_comma(voltage)}{' HT' if high_temperature else ''} RM{decimal_comma(pitch)}"
+            if rng.random() < 0.2:
+                name += " GF"
+            description_base = "Elektrolytický kondenzátor, radiální vývody"
+            expected["terminal_pitch"] = f"{float(pitch)}mm"
+        elif kind == "BSN":
+            voltage = int(voltage)
+            expected["rated_voltage"] = f"{voltage}V"
+            name = f"BSN {decimal_comma(capacitance)}/{voltage}{'-HT' if high_temperature else ''}"
+            description_base = "Elektrolytický kondenzátor s vývody SNAP-IN"
+            expected["mounting_type"] = "SNAP-IN"
+        elif kind == "RAD BIP":
+            pitch = rng.choice(pitches)
+            name = f"RAD BIP {decimal_comma(capacitance)}/{decimal_comma(voltage)}{' HT' if high_temperature else ''} RM{decimal_comma(pitch)}"
+            description_base = "Bipolární kondenzátor, radiální vývody"
+        elif kind == "AXI":
+            # AXI names do not carry the temperature rating
+            high_temperature = False
+            name = f"AXI {decimal_comma(capacitance)}/{decimal_comma(voltage)}"
+            description_base = "Elektrolytický kondenzátor, axiální vývody"
+        else:
+            name = rng.choice(["TAN 10/16", "MKT 100n/63", "RAD /16 RM5", "SMD 10/16 5x5,4"])
+            expected = None
+        if expected is not None:
+            expected["high_temperature"] = high_temperature
+            expected["description"] = (
+                f"{description_base}, prům. {dimensions}mm"
+                f"{', 105°C' if high_temperature else ''}"
+            )
+        corpus.append((ges_caps.Component(GES_name=name, dimensions=dimensions), expected))
+    return corpus
+
+
+def check_ges(corpus) -> list[str]:
+    errors = []
+    for component, expected in corpus:
+        recognized = ges_caps.fill_from_GES_name(component)
+        if recognized != (expected is not None):
+            errors.append(f"{component.GES_name}: recognized={recognized}")
+            continue
+        for key, value in (expected or {}).items():
+            if getattr(component, key) != value:
+                errors.append(f"{component.GES_name}: {key}={getattr(component, key)!r}, expected {value!r}")
+    return errors
+
+
+def run_ges(corpus) -> None:
+    for component, _ in corpus:
+        ges_caps.fill_from_GES_name(component)
+
+
+PRUSA_CATEGORIES = [
+    (("Accessories", "Nozzles"), "3D Printer Accessories/Nozzles"),
+    (("Accessories", "Print Sheets"), "3D Printer Accessories/Print Sheets"),
+    (("Accessories", "Tools & Crafting", "Tweezers"), "3D Printer Accessories"),
+    (("Filament", "PETG"), "3D Printing Filament"),
+    (("Filament", "PLA", "Prusament"), "3D Printing Filament"),
+    (("Spare parts", "Original Prusa MK4", "Electronics"), "3D Printer Accessories/Spare Parts"),
+    (("Merchandise", ), None),
+]
+
+
+def prusa_corpus(n: int, rng: random.Random) -> list[tuple[str, dict, str | None]]:
+    """Return (product page HTML, expected part data, expected category) triples."""
+    corpus = []
+    for i in range(n):
+        sku = f"product-{i}-{rng.randrange(10**6)}"
+        category, inventree_category = rng.choice(PRUSA_CATEGORIES)
+        brand = rng.choice([None, "Prusa Research", "Prusament"])
+        description = f"Spare part number {i} & more"
+        price = f"{rng.randint(10, 5000)}.{rng.randint(0, 99):02}"
+        english_url = f"https://www.prusa3d.com/product/{sku}/"
+        product = {
+            "uuid": f"00000000-0000-0000-0000-{i:012}",
+            "nameWithReplacedPlaceholders": f"Product {i}",
+            "slug": f"product/{sku}/",
+            "shortDescription": (
+                f"<p>{description.replace('&', '&amp;')}</p>"
+                f"<ul><li>feature {i}</li><li>another one</li></ul>"
+            ),
+            "urlList": [
+                {"locale": "cs", "url": f"https://www.prusa3d.com/cs/produkt/{sku}/"},
+                {"locale": "en", "url": english_url},
+                {"locale": "de", "url": f"https://www.prusa3d.com/de/produkt/{sku}/"},
+            ],
+            "stockQuantity": rng.randint(0, 1000),
+            # leaf first, as on the site
+            "breadcrumbs": [
+                {"__typename": "Category", "name": c} for c in reversed(category)
+            ] + [{"__typename": "Link", "name": "Home"}],
+            "price": {"priceWithoutVat": price, "priceWithVat": price},
+            "brand": {"name": brand} if brand else None,
+            "images": [
+                {"__typename": "Video", "url": f"/content/videos/{i}.mp4"},
+                {"__typename": "Image", "url": f"/content/images/product/{i}.jpg"},
+                {"__typename": "Image", "url": f"/content/images/product/{i}-2.jpg"},
+            ],
+        }
+        next_data = {
+            "props": {"pageProps": {"urqlState": {
+                str(rng.randrange(10**9)): {"hasNext": False, "data": json.dumps({"product": product})},
+            }}},
+            "page": "/product/[slug]",
+        }
+        # padding to get somewhat realistic page size
+        filler = "".join(f'<div class="c{j}"><a href="/x/{j}">link {j}</a></div>' for j in range(200))
+        html = (
+            "<!DOCTYPE html><html><head><title>Product</title></head><body>"
+            f"<div id=\"__next\">{filler}</div>"
+            f"<script id=\"__NEXT_DATA__\" type=\"application/json\">{json.dumps(next_data)}</script>"
+            "</body></html>"
+        )
+        expected = {
+            "name": f"Product {i}",
+            "sku": sku,
+            "description": description,
+            "prusa_uuid": product["uuid"],
+            "url": english_url,
+            "stock_quantity": product["stockQuantity"],
+            "category": category,
+            "price_czk_without_vat": price,
+            "manufacturer": brand,
+            "image": f"https://www.prusa3d.com/content/images/product/{i}.jpg",
+        }
+        corpus.append((html, expected, inventree_category))
+    return corpus
+
+
+def check_prusa(corpus) -> list[str]:
+    errors = []
+    for html, expected, inventree_category in corpus:
+        part_data = prusa3d_eshop.parse_prusa_json(prusa3d_eshop.extract_next_data(html))
+        if part_data != expected:
+            errors.append(f"{expected['sku']}: {part_data!r}, expected {expected!r}")
+        try:
+            category = prusa3d_eshop.get_inventree_category(part_data["category"])
+        except KeyError:
+            category = None
+        if category != inventree_category:
+            errors.append(f"{expected['sku']}: category {category!r}, expected {inventree_category!r}")
+    return errors
+
+
+def run_prusa_pages(corpus) -> None:
+    for html, _, _ in corpus:
+        prusa3d_eshop.parse_prusa_json(prusa3d_eshop.extract_next_data(html))
+
+
+def load_saved_pages(directory: pathlib.Path) -> list[tuple[str, str, dict | None]]:
+    """Return (name, product page HTML, expected part data) triples."""
+    pages = []
+    for path in sorted(directory.glob("*.html")):
+        expected_path = path.with_suffix(".json")
+        expected = None
+        if expected_path.exists():
+            expected = json.loads(expected_path.read_text(encoding="utf-8"))
+        pages.append((path.stem, path.read_text(encoding="utf-8"), expected))
+    return pages
+
+
+def check_saved_pages(pages) -> list[str]:
+    errors = []
+    for name, html, expected in pages:
+        try:
+            part_data = prusa3d_eshop.parse_prusa_json(prusa3d_eshop.extract_next_data(html))
+        except Exception as e:
+            errors.append(f"saved page {name}: {e!r}")
+            continue
+        # category is a tuple, JSON only has lists
+        part_data = json.loads(json.dumps(part_data))
+        if expected is not None and part_data != expected:
+            errors.append(f"saved page {name}: {part_data!r}, expected {expected!r}")
+    return errors
+
+
+def run_saved_pages(corpus) -> None:
+    for _, html, _ in corpus:
+        prusa3d_eshop.parse_prusa_json(prusa3d_eshop.extract_next_data(html))
+
+
+def run_prusa_json(corpus) -> None:
+    for json_data in corpus:
+        prusa3d_eshop.parse_prusa_json(json_data)
+
+
+def run_categories(corpus) -> None:
+    for category in corpus:
+        try:
+            prusa3d_eshop.get_inventree_category(category)
+        except KeyError:
+            pass
+
+
+def po_corpus(n: int, rng: random.Random) -> tuple[str, str]:
+    """Return (InvenTree PO export, expected TME import) pair."""
+    export = io.StringIO()
+    export.write("Line Item,Part,Part Name,SKU,MPN,quantity,received,Reference,Notes\n")
+    expected = io.StringIO()
+    for i in range(n):
+        sku = f"{rng.choice(['RES', 'CAP', 'LM', 'BC'])}-{rng.randrange(10**6)}"
+        quantity = rng.randint(1, 5000)
+        export.write(f"{i},{rng.randrange(10**4)},\"Part {i}, rev. A\",{sku},MPN{i},{quantity}.0,0.0,R{i},\n")
+        expected.write(f"{sku}\t{quantity}\n")
+    return export.getvalue(), expected.getvalue()
+
+
+def convert_po(export: str) -> str:
+    out = io.StringIO()
+    PO2TME.convert(pd.read_csv(io.StringIO(export))).to_csv(out, index=False, sep="\t", header=False)
+    return out.getvalue()
+
+
+def measure(fn, corpus, items: int, min_time: float, repeat: int = 5) -> float:
+    """Return throughput of fn(corpus) in items per second.
+
+    Best of `repeat` runs, each at least min_time / repeat long, to filter
+    out noise.
+    """
+    best = 0.0
+    for _ in range(repeat):
+        rounds = 0
+        start = time.perf_counter()
+        while True:
+            fn(corpus)
+            rounds += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time / repeat:
+                break
+        best = max(best, rounds * items / elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scale", "-s",
+        type=float, default=1.0,
+        help="multiply corpus sizes by this factor"
+    )
+    parser.add_argument(
+        "--min-time", "-t",
+        type=float, default=1.0,
+        help="minimum time to run each benchmark for (seconds)"
+    )
+    parser.add_argument(
+        "--prusa-pages", "-p",
+        type=pathlib.Path, default=PRUSA_PAGES,
+        help="directory with saved prusa3d.com product pages (*.html) "
+             "and their expected part data (*.json)"
+    )
+    parser.add_argument(
+        "--baseline", "-b",
+        type=pathlib.Path,
+        help="json file with baseline throughput to compare against"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store results to the --baseline file instead of comparing"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float, default=0.2,
+        help="allowed relative throughput drop against baseline"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    rng = random.Random(args.seed)
+    ges = ges_corpus(int(5000 * args.scale), rng)
+    prusa = prusa_corpus(int(200 * args.scale), rng)
+    prusa_json = [prusa3d_eshop.extract_next_data(html) for html, _, _ in prusa]
+    categories = [expected["category"] for _, expected, _ in prusa]
+    po_rows = int(20000 * args.scale)
+    po_export, po_expected = po_corpus(po_rows, rng)
+
+    errors = check_ges(ges) + check_prusa(prusa)
+    if convert_po(po_export) != po_expected:
+        errors.append("PO2TME: output does not match")
+
+    saved_pages = load_saved_pages(args.prusa_pages)
+    if not saved_pages:
+        _LOGGER.warning("no saved product pages in %s", args.prusa_pages)
+    errors += check_saved_pages(saved_pages)
+
+    for error in errors:
+        _LOGGER.error("%s", error)
+    if errors:
+        _LOGGER.error("%d correctness errors", len(errors))
+        sys.exit(1)
+
+    benchmarks = [
+        ("ges_caps.fill_from_GES_name", run_ges, ges, len(ges)),
+        ("prusa3d_eshop page", run_prusa_pages, prusa, len(prusa)),
+        ("prusa3d_eshop.parse_prusa_json", run_prusa_json, prusa_json, len(prusa_json)),
+        ("prusa3d_eshop.get_inventree_category", run_categories, categories, len(categories)),
+        ("PO2TME.convert", convert_po, po_export, po_rows),
+    ]
+    if saved_pages:
+        benchmarks.append(("prusa3d_eshop saved page", run_saved_pages, saved_pages, len(saved_pages)))
+
+    results = {}
+    for name, fn, corpus, items in benchmarks:
+        results[name] = measure(fn, corpus, items, args.min_time)
+        print(f"{name}: {results[name]:.0f} items/s")
+
+    if args.baseline is None:
+        return
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = [
+        name for name, throughput in results.items()
+        if name in baseline and throughput < baseline[name] * (1 - args.tolerance)
+    ]
+    for name in regressions:
+        _LOGGER.error("%s: %.0f items/s, baseline %.0f items/s", name, results[name], baseline[name])
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,29 @@
 #!/usr/bin/env python3
 import re
-from inventree.api import InvenTreeAPI
 from inventree.part import Parameter, Part, PartCategory
+from journal import Journal
+from listing import iter_list
+from client import InvenTreeClient
 
 
 class InventreeHelper:
-    def __init__(self):
+    def __init__(self, journal: Journal):
         # set environment variables: INVENTREE_API_HOST, INVENTREE_API_TOKEN, INVENTREE_API_TOKEN_NAME
-        self.api = InvenTreeAPI()
+        self.api = InvenTreeClient()
+        self.journal = journal
         self.category = PartCategory(self.api, 105)
         assert self.category.pathstring == "CNC/Tools/Drills"
 
     def set_drill_bit_parameters(self):
-        matching_parts = Part.list(self.api, search="Carbide Drill Bit 1/8")
+        matching_parts = iter_list(self.api, Part, ("pk", "name"), search="Carbide Drill Bit 1/8")
         for part in matching_parts:
             print("part:", part)
+            if self.journal.done("parameters", part.pk):
+                print("skipping, already done according to journal")
+                continue
             existing_parameters = {
-                parameter.template_detail["name"]: parameter
-                for parameter in Parameter.list(self.api, part=part.pk)
+                parameter.template_detail_name: Parameter(self.api, data={"pk": parameter.pk})
+                for parameter in iter_list(self.api, Parameter, ("pk", "template_detail.name"), part=part.pk)
             }
 
             m = re.match(
@@ -32,6 +38,8 @@ class InventreeHelper:
                     ]:
                 existing_parameter = existing_parameters[param]
                 existing_parameter.save({"data": value})
+            self.journal.record("parameters", part.pk)
 
-ih = InventreeHelper()
+ih = InventreeHelper(Journal.for_script(__file__))
 ih.set_drill_bit_parameters()
+ih.journal.complete()
@@ -0,0 +1,186 @@
+"""InvenTreeAPI sending its requests through a requests.Session."""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from inventree.api import InvenTreeAPI
+from transport import shared_session
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def bootstrap(**lookups) -> dict:
+    """Run independent startup lookups concurrently.
+
+    Returns a dict mapping each keyword to the result of its callable.
+    """
+    with ThreadPoolExecutor(max_workers=len(lookups)) as executor:
+        futures = {name: executor.submit(lookup) for name, lookup in lookups.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+class Background:
+    """Run fn(*args) in a daemon thread.
+
+    Unlike an executor's worker, the thread does not keep the process alive
+    when the user interrupts it, e.g. while the server is still connecting.
+    """
+
+    def __init__(self, fn, *args):
+        self._result = None
+        self._exception = None
+        self._thread = threading.Thread(target=self._run, args=(fn, *args), daemon=True)
+        self._thread.start()
+
+    def _run(self, fn, *args):
+        try:
+            self._result = fn(*args)
+        except BaseException as e:
+            self._exception = e
+
+    def result(self):
+        """Wait for fn to finish, return its result or raise its exception."""
+        self._thread.join()
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class InvenTreeClient(InvenTreeAPI):
+    """Drop-in replacement for InvenTreeAPI.
+
+    The upstream client calls requests.get & co. directly, which bypasses any
+    session-level configuration. This class routes the requests through
+    `session` instead, by default the one shared by all tools. Unless a
+    timeout is given explicitly (argument or INVENTREE_API_TIMEOUT), the
+    session's default timeout applies.
+    """
+
+    def __init__(self, host=None, session: requests.Session | None = None, **kwargs):
+        self.session = session if session is not None else shared_session()
+        if "timeout" not in kwargs and "INVENTREE_API_TIMEOUT" not in os.environ:
+            kwargs["timeout"] = None
+        super().__init__(host, **kwargs)
+
+    def timeout_kwargs(self, timeout=None) -> dict:
+        timeout = timeout if timeout is not None else self.timeout
+        return {} if timeout is None else {"timeout": timeout}
+
+    def testServer(self):
+        """Check that the server is present and record its API version.
+
+        Mirrors InvenTreeAPI.testServer, except for the transport.
+        """
+        self.server_details = None
+        _LOGGER.info("Checking InvenTree server connection...")
+
+        try:
+            response = self.session.get(
+                self.api_url,
+                proxies=self.proxies,
+                verify=self.strict,
+                **self.timeout_kwargs(),
+            )
+        except requests.exceptions.ConnectionError as e:
+            _LOGGER.critical("Server connection error: %s", type(e))
+            return False
+
+        if response.status_code != 200:
+            raise requests.exceptions.RequestException(
+                f"Error code from server: {response.status_code} - {response.text}"
+            )
+
+        self.server_details = json.loads(response.text)
+        _LOGGER.info("InvenTree server details: %s", response.text)
+
+        server_name = str(self.server_details.get('server', ''))
+        if not server_name.lower() == 'inventree':
+            _LOGGER.warning("Server returned strange response (expected 'InvenTree', found '%s')", server_name)
+
+        api_version = self.server_details.get('apiVersion', '1')
+        try:
+            api_version = int(api_version)
+        except ValueError:
+            raise ValueError(f"Server returned invalid API version: '{api_version}'")
+
+        if api_version < InvenTreeAPI.getMinApiVersion():
+            raise ValueError(
+                f"Server API version ({api_version}) is older than minimum "
+                f"supported API version ({InvenTreeAPI.getMinApiVersion()})"
+            )
+
+        self.api_version = api_version
+        return True
+
+    def request(self, api_url, **kwargs):
+        """Perform a URL request to the InvenTree API.
+
+        Mirrors InvenTreeAPI.request, except for the transport.
+        """
+        if not self.connected:
+            self.connect()
+
+        api_url = self.constructApiUrl(api_url)
+
+        data = kwargs.get('data', kwargs.get('json', {}))
+        files = kwargs.get('files', {})
+        params = kwargs.get('params', {})
+        headers = kwargs.get('headers', {})
+        method = kwargs.get('method', 'get').upper()
+
+        search_term = kwargs.pop('search', None)
+        if search_term is not None:
+            params['search'] = search_term
+
+        if self.use_token_auth and self.token:
+            headers['AUTHORIZATION'] = f'Token {self.token}'
+            auth = None
+        else:
+            auth = self.auth
+
+        payload = {
+            'params': params,
+            'headers': headers,
+            'auth': auth,
+            'proxies': kwargs.get('proxies', self.proxies),
+            'verify': self.strict,
+            **self.timeout_kwargs(kwargs.get('timeout')),
+        }
+
+        # If we are providing files, we cannot upload as a 'json' request
+        if files:
+            payload['data'] = data
+            payload['files'] = files
+        else:
+            payload['json'] = data
+
+        response = self.session.request(method, api_url, **payload)
+        _LOGGER.info("Request: %s %s - %s", method, api_url, response.status_code)
+
+        if response.status_code >= 300:
+            detail = {
+                'detail': 'Error occurred during API request',
+                'url': api_url,
+                'method': method,
+                'status_code': response.status_code,
+                'body': response.text,
+            }
+            if params:
+                detail['params'] = params
+            if data:
+                detail['data'] = data
+            raise requests.exceptions.HTTPError(detail, response=response)
+
+        if method == 'DELETE':
+            return response
+
+        ctype = response.headers.get('content-type')
+        if not ctype == 'application/json':
+            raise requests.exceptions.InvalidJSONError(
+                f"Response content-type is not JSON - '{api_url}' - '{ctype}'"
+            )
+
+        return response
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
+import functools
 import os
 from dataclasses import dataclass
-from inventree.api import InvenTreeAPI
 from inventree.part import Parameter, ParameterTemplate, Part, PartCategory
 from inventree.company import Company, SupplierPart, ManufacturerPart
+from journal import Journal
+from listing import iter_list
+from client import InvenTreeClient, bootstrap
 
 INVENTREE_URL = os.getenv("INVENTREE_API_HOST", "")
 
@@ -19,14 +22,23 @@ class Component:
 
 
 class InventreeHelper:
-    def __init__(self):
+    def __init__(self, journal: Journal):
         # set environment variables: INVENTREE_API_HOST, INVENTREE_API_TOKEN, INVENTREE_API_TOKEN_NAME
-        self.api = InvenTreeAPI()
-        self.GES_supplier = Company.list(self.api, name="GES electronics")[0]
-        self.econ_connect_manufacturer = Company.list(self.api, name="econ connect")[0]
-        self.category = PartCategory(self.api, 17)
+        self.api = InvenTreeClient()
+        self.journal = journal
+        lookups = bootstrap(
+            GES_supplier=lambda: Company.list(self.api, name="GES electronics")[0],
+            econ_connect_manufacturer=lambda: Company.list(self.api, name="econ connect")[0],
+            category=lambda: PartCategory(self.api, 17),
+        )
+        self.GES_supplier = lookups["GES_supplier"]
+        self.econ_connect_manufacturer = lookups["econ_connect_manufacturer"]
+        self.category = lookups["category"]
         assert self.category.pathstring == "Electronics/Connectors/Connector Housings"
-        self.parameter_templates = self.get_parameter_templates()
+
+    @functools.cached_property
+    def parameter_templates(self):
+        return self.get_parameter_templates()
 
     def get_supplier_part(self, sku):
         supplier_parts = SupplierPart.list(self.api, SKU=sku)
@@ -42,13 +54,64 @@ class InventreeHelper:
     def get_parameter_templates(self):
         return {
             parameter_template.name: parameter_template
-            for parameter_template in ParameterTemplate.list(self.api)
+            for parameter_template in iter_list(self.api, ParameterTemplate, ("pk", "name"))
         }
 
-    def create_component(self, component: Component) -> SupplierPart:
+    def create_component(self, component: Component) -> str:
+        """Create the component and return URL of its supplier part."""
+        if done := self.journal.get("supplier_part", component.GES_SKU):
+            print("skipping, already done according to journal")
+            return done["url"]
+
         if supplier_part := self.check_supplier_part(component.GES_SKU):
             print("warning: supplier part already exists")
 
+        if done := self.journal.get("part", component.GES_name):
+            part = Part(self.api, data={"pk": done["pk"]})
+            print(f"reusing journaled part {INVENTREE_URL}/part/{part.pk}/")
+        else:
+            part = self.get_or_create_part(component)
+            self.journal.record("part", component.GES_name, pk=part.pk)
+
+        if not self.journal.done("parameters", part.pk):
+            existing_parameters = {
+                parameter.template_detail_name: Parameter(self.api, data={"pk": parameter.pk})
+                for parameter in iter_list(self.api, Parameter, ("pk", "template_detail.name"), part=part.pk)
+            }
+
+            for param, value in [
+                    ("Number of Contacts", component.number_of_contacts),
+                    ("Number of Rows", component.number_of_rows),
+                    ]:
+                existing_parameter = existing_parameters[param]
+                existing_parameter.save({"data": value})
+            self.journal.record("parameters", part.pk)
+
+        if not supplier_part:
+            if done := self.journal.get("manufacturer_part", component.GES_SKU):
+                manufacturer_part = ManufacturerPart(self.api, data={"pk": done["pk"]})
+            else:
+                manufacturer_part_data = {
+                    "part": part.pk,
+                    "manufacturer": self.econ_connect_manufacturer.pk,
+                    "MPN": component.MPN,
+                }
+                manufacturer_part = ManufacturerPart.create(self.api, manufacturer_part_data)
+                self.journal.record("manufacturer_part", component.GES_SKU, pk=manufacturer_part.pk)
+
+            supplier_part_data = {
+                "part": part.pk,
+                "manufacturer_part": manufacturer_part.pk,
+                "supplier": self.GES_supplier.pk,
+                "SKU": component.GES_SKU,
+            }
+            supplier_part = SupplierPart.create(self.api, supplier_part_data)
+
+        self.journal.record("supplier_part", component.GES_SKU,
+                            pk=supplier_part.pk, url=supplier_part.url)
+        return supplier_part.url
+
+    def get_or_create_part(self, component: Component) -> Part:
         matching_parts = Part.list(self.api, search=component.GES_name)
         if len(matching_parts) >= 0:
             for p in matching_parts:
@@ -67,42 +130,12 @@ class InventreeHelper:
                 "purchaseable": True,
             }
             part = Part.create(self.api, part_data)
-
-        existing_parameters = {
-            parameter.template_detail["name"]: parameter
-            for parameter in Parameter.list(self.api, part=part.pk)
-        }
-
-        for param, value in [
-                ("Number of Contacts", component.number_of_contacts),
-                ("Number of Rows", component.number_of_rows),
-                ]:
-            existing_parameter = existing_parameters[param]
-            existing_parameter.save({"data": value})
-
-        if supplier_part:
-            return supplier_part
-
-        manufacturer_part_data = {
-            "part": part.pk,
-            "manufacturer": self.econ_connect_manufacturer.pk,
-            "MPN": component.MPN,
-        }
-        manufacturer_part = ManufacturerPart.create(self.api, manufacturer_part_data)
-
-        supplier_part_data = {
-            "part": part.pk,
-            "manufacturer_part": manufacturer_part.pk,
-            "supplier": self.GES_supplier.pk,
-            "SKU": component.GES_SKU,
-        }
-        supplier_part = SupplierPart.create(self.api, supplier_part_data)
-
-        return supplier_part
+        return part
 
 
 def main():
-    inv = InventreeHelper()
+    journal = Journal.for_script(__file__)
+    inv = InventreeHelper(journal)
 
     for c, i in enumerate([*range(1, 9), 10, 14, 16]):
         component = Component()
@@ -116,8 +149,7 @@ def main():
         component.number_of_rows = 1
         component.number_of_contacts = i
         print(component)
-        supplier_part = inv.create_component(component)
-        print(INVENTREE_URL + supplier_part.url)
+        print(INVENTREE_URL + inv.create_component(component))
 
     for c in [("BLD 14", "GES06615682", "CGD14", 14), ("BLD 16", "GES06615683", "CGD16", 16)]:
         component = Component()
@@ -128,8 +160,9 @@ def main():
         component.number_of_rows = 2
         component.number_of_contacts = c[3]
         print(component)
-        supplier_part = inv.create_component(component)
-        print(INVENTREE_URL + supplier_part.url)
+        print(INVENTREE_URL + inv.create_component(component))
+
+    journal.complete()
 
 
 if __name__ == "__main__":
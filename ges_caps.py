@@ -1,14 +1,16 @@
 #!/usr/bin/env python3
 """Tool for importing capacitors bought from GES ELECTRONICS to InvenTree."""
 
+import functools
 import questionary
 import re
 import os
 from dataclasses import dataclass
-from inventree.api import InvenTreeAPI
 from inventree.part import Parameter, ParameterTemplate, Part, PartCategory
 from inventree.stock import StockItem, StockLocation
 from inventree.company import Company, SupplierPart
+from client import Background, InvenTreeClient, bootstrap
+from listing import iter_list
 
 
 @dataclass
@@ -25,17 +27,97 @@ class Component:
     high_temperature: bool = False  # only used internally
 
 
+def match_GES_name(component: Component):
+    m = re.match(
+        # not forcing $ to allow trailing "GF", etc.
+        r"^RAD (?P<capacitance>[0-9,]+)/(?P<voltage>[0-9,]+)(?P<HT> HT)? RM(?P<RM>[0-9,]+)",
+        component.GES_name
+    )
+    if m:
+        component.terminal_pitch = f"{float(m.group('RM').replace(',', '.'))}mm"
+        description_base = "Elektrolytický kondenzátor, radiální vývody"
+        return m, description_base
+
+    m = re.match(
+        r"^BSN (?P<capacitance>[0-9,]+)/(?P<voltage>\d+)(?P<HT>-HT)?$",
+        component.GES_name
+    )
+    if m:
+        description_base = "Elektrolytický kondenzátor s vývody SNAP-IN"
+        component.mounting_type = "SNAP-IN"
+        return m, description_base
+
+    m = re.match(
+        r"^RAD BIP (?P<capacitance>[0-9,]+)/(?P<voltage>[0-9,]+)(?P<HT> HT)? RM(?P<RM>[0-9,]+)",
+        component.GES_name
+    )
+    if m:
+        description_base = "Bipolární kondenzátor, radiální vývody"
+        return m, description_base
+
+    m = re.match(
+        r"^AXI (?P<capacitance>[0-9,]+)/(?P<voltage>[0-9,]+)",
+        component.GES_name
+    )
+    if m:
+        description_base = "Elektrolytický kondenzátor, axiální vývody"
+        return m, description_base
+
+    return None, ""
+
+
+def parse_number(value: str) -> int | float:
+    try:
+        return int(value)
+    except ValueError:
+        return float(value.replace(',', '.'))
+
+
+def fill_from_GES_name(component: Component) -> bool:
+    """Fill in parameters and description based on the GES name and dimensions.
+
+    Returns False if the name was not recognized.
+    """
+    m, description_base = match_GES_name(component)
+    if not m:
+        return False
+
+    capacitance = parse_number(m.group('capacitance'))
+    voltage = parse_number(m.group('voltage'))
+    component.capacitance = f"{capacitance}µF"
+    component.rated_voltage = f"{voltage}V"
+    try:
+        component.high_temperature = m.group("HT") is not None
+    except IndexError:
+        component.high_temperature = False
+    component.package_type = f"Ø{component.dimensions}mm"
+    component.description = (
+        f"{description_base}, "
+        f"prům. {component.dimensions}mm"
+        f"{', 105°C' if component.high_temperature else ''}"
+    )
+    return True
+
+
 class InventreeHelper:
     def __init__(self):
         # set environment variables: INVENTREE_API_HOST, INVENTREE_API_TOKEN, INVENTREE_API_TOKEN_NAME
-        self.api = InvenTreeAPI()
-        self.GES_supplier = Company.list(self.api, name="GES electronics")[0]
-        self.category = PartCategory(self.api, 65)
+        self.api = InvenTreeClient()
+        lookups = bootstrap(
+            GES_supplier=lambda: Company.list(self.api, name="GES electronics")[0],
+            category=lambda: PartCategory(self.api, 65),
+            location=lambda: StockLocation(self.api, 16),
+        )
+        self.GES_supplier = lookups["GES_supplier"]
+        self.category = lookups["category"]
         assert self.category.pathstring == "Electronics/Passives/Capacitors/Aluminum Electrolytic"
-        self.parameter_templates = self.get_parameter_templates()
-        self.location = StockLocation(self.api, 16)
+        self.location = lookups["location"]
         assert self.location.pathstring == "Skrin chodba/Capacitors electrolytic GES"
 
+    @functools.cached_property
+    def parameter_templates(self):
+        return self.get_parameter_templates()
+
     def get_supplier_part(self, sku):
         supplier_parts = SupplierPart.list(self.api, SKU=sku)
         if len(supplier_parts) == 1:
@@ -54,7 +136,7 @@ class InventreeHelper:
     def get_parameter_templates(self):
         return {
             parameter_template.name: parameter_template
-            for parameter_template in ParameterTemplate.list(self.api)
+            for parameter_template in iter_list(self.api, ParameterTemplate, ("pk", "name"))
         }
 
     def check_supplier_part(self, SKU: str) -> SupplierPart | None:
@@ -81,8 +163,8 @@ class InventreeHelper:
             part = Part.create(self.api, part_data)
 
         existing_parameters = {
-            parameter.template_detail["name"]: parameter
-            for parameter in Parameter.list(self.api, part=part.pk)
+            parameter.template_detail_name: Parameter(self.api, data={"pk": parameter.pk})
+            for parameter in iter_list(self.api, Parameter, ("pk", "template_detail.name"), part=part.pk)
         }
 
         for param, value in [
@@ -122,7 +204,8 @@ class InventreeHelper:
 
 
 def main():
-    inv = InventreeHelper()
+    # connect in the background, the first prompt does not need the server
+    inv_future = Background(InventreeHelper)
 
     params_1 = [
         ("GES_SKU", re.compile(r"^GES[0-9]{8}$")),
@@ -151,6 +234,7 @@ def main():
                         ).unsafe_ask()
                         )
                 if key == "GES_SKU":
+                    inv = inv_future.result()
                     if supplier_part := inv.check_supplier_part(component.GES_SKU):
                         print("found existing supplier part")
                         break
@@ -158,69 +242,7 @@ def main():
             if supplier_part is not None:
                 break
 
-            def match_GES_name(component):
-                m = re.match(
-                    # not forcing $ to allow trailing "GF", etc.
-                    r"^RAD (?P<capacitance>[0-9,]+)/(?P<voltage>[0-9,]+)(?P<HT> HT)? RM(?P<RM>[0-9,]+)",
-                    component.GES_name
-                )
-                if m:
-                    component.terminal_pitch = f"{float(m.group('RM').replace(',', '.'))}mm"
-                    description_base = "Elektrolytický kondenzátor, radiální vývody"
-                    return m, description_base
-
-                m = re.match(
-                    r"^BSN (?P<capacitance>[0-9,]+)/(?P<voltage>\d+)(?P<HT>-HT)?$",
-                    component.GES_name
-                )
-                if m:
-                    description_base = "Elektrolytický kondenzátor s vývody SNAP-IN"
-                    component.mounting_type = "SNAP-IN"
-                    return m, description_base
-
-                m = re.match(
-                    r"^RAD BIP (?P<capacitance>[0-9,]+)/(?P<voltage>[0-9,]+)(?P<HT> HT)? RM(?P<RM>[0-9,]+)",
-                    component.GES_name
-                )
-                if m:
-                    description_base = "Bipolární kondenzátor, radiální vývody"
-                    return m, description_base
-
-                m = re.match(
-                    r"^AXI (?P<capacitance>[0-9,]+)/(?P<voltage>[0-9,]+)",
-                    component.GES_name
-                )
-                if m:
-                    description_base = "Elektrolytický kondenzátor, axiální vývody"
-                    return m, description_base
-
-                return None, ""
-
-            m, description_base = match_GES_name(component)
-
-            # common for all regexes:
-            if m:
-                try:
-                    capacitance = int(m.group('capacitance'))
-                except ValueError:
-                    capacitance = float(m.group('capacitance').replace(',', '.'))
-                try:
-                    voltage = int(m.group('voltage'))
-                except ValueError:
-                    voltage = float(m.group('voltage').replace(',', '.'))
-                component.capacitance = f"{capacitance}µF"
-                component.rated_voltage = f"{voltage}V"
-                try:
-                    component.high_temperature = m.group("HT") is not None
-                except IndexError:
-                    component.high_temperature = False
-                component.package_type = f"Ø{component.dimensions}mm"
-                component.description = (
-                    f"{description_base}, "
-                    f"prům. {component.dimensions}mm"
-                    f"{', 105°C' if component.high_temperature else ''}"
-                )
-            else:
+            if not fill_from_GES_name(component):
                 print("warning: regex did not match")
 
                 for key, validate_regex in params_2:
@@ -0,0 +1,217 @@
+"""Adaptive per-host rate limiting and backoff for HTTP traffic.
+
+Mount GovernedAdapter on a requests.Session (see transport.make_session) and every
+request made through it is
+
+- rate limited by a per-host token bucket (unlimited unless
+  INVENTREE_RATE_LIMIT is set to requests per second, the bucket still
+  honors Retry-After and backoff pauses),
+- limited to an adaptive number of concurrent requests per host (AIMD:
+  the limit grows by one per round trip while the host responds quickly and
+  is halved, at most once per round trip, on errors, 429 and 5xx responses
+  or when recent latency trends well above its long-term average),
+- retried with exponential backoff on 429/503 (honoring Retry-After) and,
+  for idempotent methods, on connection errors and timeouts. A response
+  asking to retry after more than max_backoff seconds is returned as is.
+"""
+
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+_LOGGER = logging.getLogger(__name__)
+
+RETRY_STATUS = {429, 503}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# requests per second per host, None for unlimited
+RATE_LIMIT = float(os.environ["INVENTREE_RATE_LIMIT"]) if os.getenv("INVENTREE_RATE_LIMIT") else None
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return number of seconds to wait according to a Retry-After header."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Token bucket, `rate` None only enforces pauses."""
+
+    def __init__(self, rate: float | None, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Do not hand out any tokens for the given number of seconds."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.rate is None:
+                    return
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostGovernor:
+    """Token bucket and AIMD concurrency limit for a single host."""
+
+    # smoothing factors of the recent and the long-term latency average
+    RECENT_ALPHA = 0.3
+    BASELINE_ALPHA = 0.02
+
+    def __init__(self, host: str, rate: float | None, burst: int, initial_concurrency: int,
+                 max_concurrency: int, latency_factor: float):
+        self.host = host
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.latency_factor = latency_factor
+        self.limit = float(initial_concurrency)
+        self.in_flight = 0
+        self.recent_latency = None
+        self.baseline_latency = None
+        # responses since the last decrease, decrease at most once per round trip
+        self.since_decrease = 0
+        self.cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+        self.bucket.acquire()
+
+    def release(self, latency: float, ok: bool) -> None:
+        with self.cond:
+            self.in_flight -= 1
+            self.since_decrease += 1
+            slow = False
+            if ok:
+                if self.baseline_latency is None:
+                    self.recent_latency = self.baseline_latency = latency
+                else:
+                    self.recent_latency += self.RECENT_ALPHA * (latency - self.recent_latency)
+                    self.baseline_latency += self.BASELINE_ALPHA * (latency - self.baseline_latency)
+                slow = self.recent_latency > self.latency_factor * self.baseline_latency
+            if ok and not slow:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            elif self.since_decrease >= self.limit:
+                self.limit = max(1.0, self.limit / 2)
+                self.since_decrease = 0
+                _LOGGER.debug("%s: %s, concurrency limit %.1f",
+                              self.host, "slow responses" if ok else "error", self.limit)
+            self.cond.notify_all()
+
+    def cancel(self) -> None:
+        """Give back the slot of a request that failed before reaching the host."""
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        _LOGGER.info("%s: backing off for %.1f s", self.host, seconds)
+        self.bucket.pause(seconds)
+
+
+class RequestGovernor:
+    def __init__(self, rate: float | None = RATE_LIMIT, burst: int = 10, initial_concurrency: int = 4,
+                 max_concurrency: int = 8, latency_factor: float = 3.0, retries: int = 5,
+                 backoff: float = 1.0, max_backoff: float = 60.0):
+        self.rate = rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_factor = latency_factor
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def host(self, host: str) -> HostGovernor:
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostGovernor(
+                    host, self.rate, self.burst, self.initial_concurrency,
+                    self.max_concurrency, self.latency_factor
+                )
+            return self.hosts[host]
+
+    def backoff_delay(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+
+class GovernedAdapter(HTTPAdapter):
+    def __init__(self, governor: RequestGovernor, **kwargs):
+        self.governor = governor
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        host = self.governor.host(urlparse(request.url).netloc)
+        retry_errors = request.method in IDEMPOTENT_METHODS
+        for attempt in range(self.governor.retries + 1):
+            last_attempt = attempt == self.governor.retries
+            host.acquire()
+            start = time.monotonic()
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                host.release(time.monotonic() - start, ok=False)
+                if last_attempt or not retry_errors:
+                    raise
+                host.pause(self.governor.backoff_delay(attempt))
+                continue
+            except BaseException:
+                # e.g. InvalidURL, not a sign of congestion
+                host.cancel()
+                raise
+            latency = time.monotonic() - start
+            # time spent on the wire, without waiting for the governor
+            response.latency = latency
+
+            ok = response.status_code != 429 and response.status_code < 500
+            host.release(latency, ok=ok)
+            if response.status_code not in RETRY_STATUS or last_attempt:
+                return response
+
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = self.governor.backoff_delay(attempt)
+            elif delay > self.governor.max_backoff:
+                _LOGGER.warning("%s: server asks to retry after %.0f s, giving up",
+                                host.host, delay)
+                return response
+            host.pause(delay)
+            response.close()
+
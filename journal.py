@@ -0,0 +1,63 @@
+"""Append-only journal of completed steps for resumable batch imports.
+
+Each line of the journal file is a JSON object describing one finished step,
+e.g. a created part and its pk. When a script is rerun after a failure, the
+steps found in the journal are skipped without querying the server again.
+
+The journal is deleted once the whole run succeeds (see complete), so a
+later run starts from scratch. Delete the journal file manually to discard
+a failed run.
+"""
+
+import json
+import os
+import pathlib
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.entries = {}
+        needs_newline = False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    needs_newline = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # the last line is truncated if we died mid-write
+                        continue
+                    self.entries[(entry["step"], entry["key"])] = entry["result"]
+        except FileNotFoundError:
+            pass
+        self.file = open(self.path, "a", encoding="utf-8")
+        if needs_newline:
+            self.file.write("\n")
+
+    @classmethod
+    def for_script(cls, script_file: str) -> "Journal":
+        """Open the journal of a script in the current working directory."""
+        return cls(pathlib.Path(script_file).stem + ".journal")
+
+    def get(self, step: str, key) -> dict | None:
+        return self.entries.get((step, str(key)))
+
+    def done(self, step: str, key) -> bool:
+        """Return True if the step was recorded, even without any result."""
+        return (step, str(key)) in self.entries
+
+    def complete(self) -> None:
+        """Delete the journal after a successful run."""
+        self.file.close()
+        self.path.unlink(missing_ok=True)
+        self.entries = {}
+
+    def record(self, step: str, key, **result) -> dict:
+        key = str(key)
+        entry = {"step": step, "key": key, "result": result}
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.entries[(step, key)] = result
+        return result
@@ -1,32 +1,49 @@
 #!/usr/bin/env python3
+import functools
 import re
-from inventree.api import InvenTreeAPI
 from inventree.part import Parameter, ParameterTemplate, Part, PartCategory
+from journal import Journal
+from listing import iter_list
+from kicad_libs import KiCadLibraryIndex
+from client import InvenTreeClient
 
 
 class InventreeHelper:
-    def __init__(self):
+    def __init__(self, journal: Journal):
+        self.kicad_index = KiCadLibraryIndex()
+        if self.kicad_index.is_empty():
+            raise Exception(
+                f"no KiCad libraries found, searched: {self.kicad_index.describe_search_paths()} "
+                "(set KICAD_LIBRARY_PATH)"
+            )
         # set environment variables: INVENTREE_API_HOST, INVENTREE_API_TOKEN, INVENTREE_API_TOKEN_NAME
-        self.api = InvenTreeAPI()
-        self.parameter_templates = self.get_parameter_templates()
+        self.api = InvenTreeClient()
+        self.journal = journal
+
+    @functools.cached_property
+    def parameter_templates(self):
+        return self.get_parameter_templates()
 
     def get_parameter_templates(self):
         return {
             parameter_template.name: parameter_template
-            for parameter_template in ParameterTemplate.list(self.api)
+            for parameter_template in iter_list(self.api, ParameterTemplate, ("pk", "name"))
         }
 
     def set_kicad_NS25(self):
         category = PartCategory(self.api, 20)
         assert category.pathstring == "Electronics/Connectors/Rectangular"
 
-        matching_parts = Part.list(self.api, category=category, search="NS25-W")
+        matching_parts = iter_list(self.api, Part, ("pk", "name"), category=category.pk, search="NS25-W")
 
         for part in matching_parts:
             print("part:", part)
+            if self.journal.done("parameters", part.pk):
+                print("skipping, already done according to journal")
+                continue
             existing_parameters = {
-                parameter.template_detail["name"]: parameter
-                for parameter in Parameter.list(self.api, part=part.pk)
+                parameter.template_detail_name: Parameter(self.api, data={"pk": parameter.pk})
+                for parameter in iter_list(self.api, Parameter, ("pk", "template_detail.name"), part=part.pk)
             }
 
             m = re.match(
@@ -44,8 +61,18 @@ class InventreeHelper:
             else:
                 raise Exception("unknown variant")
 
+            symbol = f"Connector:Conn_01x{pin_count:02}_Pin"
+            if not self.kicad_index.has_symbol_library(symbol):
+                raise Exception(f"KiCad symbol library of {symbol} not found, searched: {self.kicad_index.describe_search_paths()}")
+            if not self.kicad_index.has_footprint_library(footprint):
+                raise Exception(f"KiCad footprint library of {footprint} not found, searched: {self.kicad_index.describe_search_paths()}")
+            if not self.kicad_index.has_symbol(symbol):
+                raise Exception(f"KiCad symbol does not exist: {symbol}")
+            if not self.kicad_index.has_footprint(footprint):
+                raise Exception(f"KiCad footprint does not exist: {footprint}")
+
             for param, value in [
-                    ("KiCad Symbol", f"Connector:Conn_01x{pin_count:02}_Pin"),
+                    ("KiCad Symbol", symbol),
                     ("KiCad Footprint", footprint),
                     ]:
                 parameter = existing_parameters.get(param, None)
@@ -60,7 +87,9 @@ class InventreeHelper:
                             "data": value
                         }
                     )
+            self.journal.record("parameters", part.pk)
 
 
-ih = InventreeHelper()
+ih = InventreeHelper(Journal.for_script(__file__))
 ih.set_kicad_NS25()
+ih.journal.complete()
@@ -0,0 +1,148 @@
+"""Cached index of local KiCad symbol and footprint libraries.
+
+Used to check that generated "KiCad Symbol" and "KiCad Footprint" parameter
+values refer to something that actually exists, e.g.
+Connector:Conn_01x02_Pin or Connector_Ninigi:Ninigi_NS25_W2P_1x02_P2.54mm_Vertical.
+
+Libraries are searched for in directories listed in KICAD_LIBRARY_PATH
+(os.pathsep separated), KICAD*_SYMBOL_DIR, KICAD*_FOOTPRINT_DIR and the
+default system location. The index is stored in the user's cache directory
+and only libraries whose mtime changed are rescanned.
+"""
+
+import json
+import mmap
+import os
+import pathlib
+import re
+
+CACHE_FILE = pathlib.Path(
+    os.getenv("XDG_CACHE_HOME", pathlib.Path.home() / ".cache")
+) / "inventree_utils" / "kicad_index.json"
+
+# Top level symbols are indented by one level (tab in KiCad 8+, two spaces
+# before that), units of a symbol ("Name_0_1") are nested deeper.
+SYMBOL_RE = re.compile(rb'^(?:\t| {2})\(symbol "((?:[^"\\]|\\.)*)"', re.MULTILINE)
+
+
+def default_search_paths() -> list[pathlib.Path]:
+    paths = [
+        pathlib.Path(p)
+        for p in os.getenv("KICAD_LIBRARY_PATH", "").split(os.pathsep) if p
+    ]
+    for name, value in sorted(os.environ.items()):
+        if re.fullmatch(r"KICAD\d*_(SYMBOL|FOOTPRINT)_DIR", name):
+            paths.append(pathlib.Path(value))
+    paths += [pathlib.Path("/usr/share/kicad/symbols"), pathlib.Path("/usr/share/kicad/footprints")]
+    return [p for p in paths if p.is_dir()]
+
+
+def find_libraries(root: pathlib.Path):
+    """Yield paths of *.pretty directories and *.kicad_sym files under root."""
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.name.endswith(".pretty") and entry.is_dir():
+                yield pathlib.Path(entry.path)
+            elif entry.name.endswith(".kicad_sym") and entry.is_file():
+                yield pathlib.Path(entry.path)
+            elif entry.name.endswith(".3dshapes"):
+                continue
+            elif entry.is_dir(follow_symlinks=False):
+                yield from find_libraries(entry.path)
+
+
+def scan_footprints(library: pathlib.Path) -> list[str]:
+    return [
+        name.removesuffix(".kicad_mod")
+        for name in os.listdir(library) if name.endswith(".kicad_mod")
+    ]
+
+
+def scan_symbols(library: pathlib.Path) -> list[str]:
+    with open(library, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return [
+                match[1].decode().replace('\\"', '"')
+                for match in SYMBOL_RE.finditer(m)
+            ]
+
+
+class KiCadLibraryIndex:
+    def __init__(self, search_paths: list[pathlib.Path] | None = None,
+                 cache_file: pathlib.Path | None = CACHE_FILE):
+        self.search_paths = default_search_paths() if search_paths is None else search_paths
+        self.cache_file = cache_file
+        self.symbols = set()
+        self.footprints = set()
+        self.symbol_libraries = set()
+        self.footprint_libraries = set()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """(Re)build the index, rescanning only libraries modified since the last run."""
+        cache = {}
+        if self.cache_file is not None:
+            try:
+                with open(self.cache_file, encoding="utf-8") as f:
+                    cache = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+
+        libraries = {}
+        modified = False
+        for root in self.search_paths:
+            for library in find_libraries(root):
+                key = str(library)
+                mtime = library.stat().st_mtime_ns
+                cached = cache.get(key)
+                if cached is None or cached["mtime"] != mtime:
+                    if library.suffix == ".pretty":
+                        names = scan_footprints(library)
+                    else:
+                        names = scan_symbols(library)
+                    cached = {"mtime": mtime, "names": names}
+                    modified = True
+                libraries[key] = cached
+        modified |= libraries.keys() != cache.keys()
+
+        self.symbols = set()
+        self.footprints = set()
+        self.symbol_libraries = set()
+        self.footprint_libraries = set()
+        for key, library in libraries.items():
+            path = pathlib.Path(key)
+            if path.suffix == ".pretty":
+                names, nicknames = self.footprints, self.footprint_libraries
+            else:
+                names, nicknames = self.symbols, self.symbol_libraries
+            nicknames.add(path.stem)
+            names.update(f"{path.stem}:{name}" for name in library["names"])
+
+        if modified and self.cache_file is not None:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(libraries, f)
+            tmp.replace(self.cache_file)
+
+    def describe_search_paths(self) -> str:
+        return ", ".join(map(str, self.search_paths)) or "nothing"
+
+    def is_empty(self) -> bool:
+        return not (self.symbols or self.footprints)
+
+    def has_symbol_library(self, name: str) -> bool:
+        """Check whether the library nickname of symbol `name` is indexed."""
+        return name.split(":", 1)[0] in self.symbol_libraries
+
+    def has_footprint_library(self, name: str) -> bool:
+        """Check whether the library nickname of footprint `name` is indexed."""
+        return name.split(":", 1)[0] in self.footprint_libraries
+
+    def has_symbol(self, name: str) -> bool:
+        return name in self.symbols
+
+    def has_footprint(self, name: str) -> bool:
+        return name in self.footprints
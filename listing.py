@@ -0,0 +1,53 @@
+"""Lazy, paginated listing of InvenTree collections.
+
+Model.list() downloads the whole collection and wraps every item in a model
+object. iter_list() fetches one page at a time and yields namedtuples holding
+only the requested fields, so memory use stays bounded on large collections.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+import requests
+
+PAGE_SIZE = 250
+
+
+@lru_cache
+def record_type(model, fields: tuple):
+    # "template_detail.name" -> attribute template_detail_name
+    return namedtuple(f"{model.__name__}Record", [f.replace(".", "_") for f in fields])
+
+
+def get_field(data: dict, field: str):
+    for key in field.split("."):
+        data = data[key]
+    return data
+
+
+def iter_list(api, model, fields, page_size: int = PAGE_SIZE, **params):
+    """Yield records with `fields` of all `model` objects matching `params`.
+
+    Nested fields are selected with a dot, e.g. "template_detail.name".
+    The InvenTree API has no generic way to select returned fields, pass
+    e.g. part_detail=False to skip the nested objects where an endpoint
+    supports it.
+    """
+    model.checkApiVersion(api)
+    fields = tuple(fields)
+    record = record_type(model, fields)
+    url = model.get_url(api)
+    offset = 0
+    while True:
+        page = api.get(url, params={**params, "limit": page_size, "offset": offset})
+        if page is None:
+            # InvenTreeAPI.get returns None instead of raising on a bad response
+            raise requests.exceptions.InvalidJSONError(
+                f"No data returned from '{url}' (offset {offset})"
+            )
+        # endpoints without pagination return a plain list
+        results = page["results"] if isinstance(page, dict) else page
+        for data in results:
+            yield record._make(get_field(data, f) for f in fields)
+        if not isinstance(page, dict) or not page.get("next") or not results:
+            return
+        offset += len(results)
@@ -2,7 +2,6 @@
 """Import products from prusa3d.com e-shop to inventree."""
 
 import argparse
-import requests
 import json
 import re
 import os
@@ -12,14 +11,19 @@ import mimetypes
 import urllib
 from urllib.parse import urlparse
 from bs4 import BeautifulSoup  # pip3 install beautifulsoup4
-from inventree.api import InvenTreeAPI
 from inventree.part import Part, PartCategory
 from inventree.company import Company, SupplierPart, SupplierPriceBreak
+from journal import Journal
+from client import Background, InvenTreeClient
+from transport import shared_session
 
 # environment variables needed:
 # INVENTREE_API_HOST, INVENTREE_API_TOKEN, INVENTREE_API_TOKEN_NAME
 INVENTREE_URL = os.getenv("INVENTREE_API_HOST")
 
+# shared by the scraper and the InvenTree client
+SESSION = shared_session()
+
 COOKIES = {
     "CURRENCY_CODE": "CZK",
 }
@@ -44,8 +48,9 @@ def get_inventree_category(prusa_category: tuple) -> str:
 
 
 class InventreeHelper:
-    def __init__(self):
-        self.api = InvenTreeAPI()
+    def __init__(self, journal: Journal):
+        self.api = InvenTreeClient(session=SESSION)
+        self.journal = journal
         self.prusa_company = Company.list(self.api, name="Prusa Research")[0]
 
     def get_category(self, category_path):
@@ -67,7 +72,7 @@ class InventreeHelper:
         return self.get_supplier_part(sku)
 
     def upload_image(self, part: Part, image_url: str, filename_prefix: str):
-        r = requests.get(image_url)
+        r = SESSION.get(image_url)
         r.raise_for_status()
         image_content = r.content
         if not image_content:
@@ -82,7 +87,7 @@ class InventreeHelper:
                 f.write(image_content)
             part.uploadImage(str(img_file))
 
-    def create_prusa_part(self, part_data: dict) -> SupplierPart:
+    def get_or_create_part(self, part_data: dict) -> Part:
         matching_parts = Part.list(self.api, search=part_data["name"])
         if len(matching_parts) == 1:
             part = matching_parts[0]
@@ -104,6 +109,15 @@ class InventreeHelper:
             }
             part = Part.create(self.api, inventree_part_data)
             self.upload_image(part, part_data["image"], part_data["sku"])
+        return part
+
+    def create_prusa_part(self, part_data: dict) -> SupplierPart:
+        if done := self.journal.get("part", part_data["sku"]):
+            part = Part(self.api, data={"pk": done["pk"]})
+            print(f"reusing journaled part {INVENTREE_URL}/part/{part.pk}/")
+        else:
+            part = self.get_or_create_part(part_data)
+            self.journal.record("part", part_data["sku"], pk=part.pk)
 
         supplier_part_data = {
             "part": part.pk,
@@ -200,10 +214,8 @@ def parse_prusa_json(json_data: dict) -> dict:
     return part_data
 
 
-def get_part_json(listing_url: str) -> dict:
-    r = requests.get(listing_url, cookies=COOKIES)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+def extract_next_data(html: str) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
     script_tag = soup.find("script", id="__NEXT_DATA__", type="application/json")
     assert script_tag
     script_data = script_tag.string.strip()
@@ -212,6 +224,12 @@ def get_part_json(listing_url: str) -> dict:
     return json_data
 
 
+def get_part_json(listing_url: str) -> dict:
+    r = SESSION.get(listing_url, cookies=COOKIES)
+    r.raise_for_status()
+    return extract_next_data(r.text)
+
+
 def get_part_data(listing_url: str) -> dict:
     json_data = get_part_json(listing_url)
     return parse_prusa_json(json_data)
@@ -239,17 +257,27 @@ def get_english_url(listing_url: str) -> str:
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("listing_url", type=url_type)
+    parser.add_argument("listing_url", type=url_type, nargs="+")
     args = parser.parse_args()
 
-    listing_url = get_english_url(args.listing_url)
     from pprint import pprint
-    part_data: dict = get_part_data(listing_url)
-    pprint(part_data)
-
-    inv = InventreeHelper()
-    sp = inv.create_prusa_part(part_data)
-    print(f"\nimported supplier part: {INVENTREE_URL}{sp.url}")
+    journal = Journal.for_script(__file__)
+    # connect to InvenTree while the first product page is being scraped
+    inv_future = Background(InventreeHelper, journal)
+    for listing_url in args.listing_url:
+        if done := journal.get("imported", listing_url):
+            print(f"already imported: {INVENTREE_URL}{done['url']}")
+            continue
+
+        english_url = get_english_url(listing_url)
+        part_data: dict = get_part_data(english_url)
+        pprint(part_data)
+
+        sp = inv_future.result().create_prusa_part(part_data)
+        journal.record("imported", listing_url, pk=sp.pk, url=sp.url)
+        print(f"\nimported supplier part: {INVENTREE_URL}{sp.url}")
+
+    journal.complete()
 
 
 if __name__ == "__main__":
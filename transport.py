@@ -0,0 +1,97 @@
+"""Shared, pooled HTTP session for the InvenTree client and the scrapers.
+
+Set INVENTREE_WORKERS to size the connection pools for the number of
+concurrent workers and INVENTREE_TRANSPORT_STATS=1 to print per-host request
+counts, mean time per request (total and on the wire) and number of opened
+connections on exit.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from urllib3.util.request import ACCEPT_ENCODING
+from governor import GovernedAdapter, RequestGovernor
+
+WORKERS = int(os.getenv("INVENTREE_WORKERS", "4"))
+# (connect, read) in seconds
+DEFAULT_TIMEOUT = (3.05, 30)
+
+
+class PooledSession(requests.Session):
+    """requests.Session with a default timeout and per-host timing stats."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+        # hostname -> [number of requests, total seconds, seconds on the wire]
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.monotonic()
+        response = None
+        try:
+            response = super().request(method, url, **kwargs)
+            return response
+        finally:
+            elapsed = time.monotonic() - start
+            with self.stats_lock:
+                stats = self.stats.setdefault(urlparse(url).hostname, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += getattr(response, "latency", elapsed)
+
+    def connections_opened(self) -> dict:
+        connections = {}
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                connections[pool.host] = connections.get(pool.host, 0) + pool.num_connections
+        return connections
+
+    def report(self) -> str:
+        connections = self.connections_opened()
+        with self.stats_lock:
+            return "\n".join(
+                f"{host}: {count} requests, {1000 * seconds / count:.1f} ms per request "
+                f"({1000 * wire / count:.1f} ms on the wire), "
+                f"{connections.get(host, 0)} connections opened"
+                for host, (count, seconds, wire) in sorted(self.stats.items())
+            )
+
+
+def make_session(workers: int = WORKERS, governor: RequestGovernor | None = None,
+                 timeout=DEFAULT_TIMEOUT) -> PooledSession:
+    if governor is None:
+        governor = RequestGovernor(initial_concurrency=min(4, workers), max_concurrency=workers)
+    session = PooledSession(timeout)
+    # keep-alive pools big enough that no worker has to open a new connection
+    # and no request admitted by the governor waits for a pooled connection
+    pool_size = max(workers, governor.max_concurrency)
+    adapter = GovernedAdapter(governor, pool_maxsize=pool_size, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # gzip, deflate and br/zstd if the decoders are installed
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    return session
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def shared_session() -> PooledSession:
+    """Return the session shared by everything in this process."""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = make_session()
+            if os.getenv("INVENTREE_TRANSPORT_STATS"):
+                atexit.register(lambda: print(_shared_session.report(), file=sys.stderr))
+        return _shared_session